@@ -1,9 +1,36 @@
 import os
-import requests
+import re
+import json
+import asyncio
+import hashlib
+import httpx
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+import numpy as np
 import pandas as pd
 import plotly.graph_objects as go
+from plotly.colors import hex_to_rgb, qualitative
+from plotly.subplots import make_subplots
 from pandas import DataFrame
-from urllib.parse import urlparse
+
+# Maximum number of points per trace handed over to Plotly
+MAX_POINTS = 1000
+# Contributor series of at least this many weeks are drawn as min/max envelopes over fixed-width bins
+AGGREGATION_THRESHOLD = 500
+AGGREGATION_BINS = 250
+# Directory for GitHub responses reused through conditional requests
+CACHE_DIR = ".cache"
+# Seconds to wait for a single GitHub API response
+REQUEST_TIMEOUT = 30
+# Owner and name of a repository from its web or API URL
+GITHUB_URL_PATTERN = re.compile(r"github\.com/(?:repos/)?([^/]+)/([^/?#]+?)(?:\.git)?(?:[/?#]|$)")
+# Dark theme layout of the figure, kept next to the other display settings
+BASE_LAYOUT = dict(
+    template="plotly_dark",
+    hovermode="x unified",
+    legend=dict(orientation="h", yanchor="top", y=-0.05, xanchor="center", x=0.5),
+    margin=dict(l=40, r=40, t=40, b=40),
+)
 
 
 def ensure_env_file():
@@ -30,19 +57,21 @@ def load_env_variables():
     env_vars = {}
     with open(".env", "r") as env_file:
         for line in env_file:
-            if "=" in line:
-                key, value = line.strip().split("=", 1)
+            if line.startswith("#"):
+                continue
+            key, sep, value = line.partition("=")
+            if sep:
                 env_vars[key.strip()] = value.strip()
 
     _token = env_vars.get("TOKEN")
     owner, name = None, None
 
     if env_vars.get("URL"):
-        try:
-            # Extract owner and repo from URL
-            parsed_url = urlparse(env_vars["URL"])
-            _, owner, name = parsed_url.path.strip("/").split("/")
-        except ValueError:
+        # Extract owner and repo from URL
+        match = GITHUB_URL_PATTERN.search(env_vars["URL"])
+        if match:
+            owner, name = match.groups()
+        else:
             print("Invalid URL format. Falling back to REPO_OWNER and REPO_NAME.")
 
     if not owner or not name:
@@ -56,187 +85,379 @@ def load_env_variables():
     return owner, name, _token
 
 
-def fetch_code_frequency(_owner, _name, _token):
+def _cache_path(url):
+    """
+    Builds the path of the cache file for the given URL.
+    :param url: GitHub API endpoint.
+    :return: Path to the cache file.
+    """
+    return os.path.join(CACHE_DIR, hashlib.sha1(url.encode()).hexdigest() + ".json")
+
+
+def _load_cache(url):
+    """
+    Loads the cached response for the given URL.
+    :param url: GitHub API endpoint.
+    :return: Tuple of ETag and JSON data, or (None, None) if nothing is cached.
+    """
+    try:
+        with open(_cache_path(url), "r") as cache_file:
+            cached = json.load(cache_file)
+        return cached["etag"], cached["data"]
+    except (OSError, ValueError, KeyError):
+        return None, None
+
+
+def _store_cache(url, etag, data):
+    """
+    Stores the response for the given URL along with its ETag.
+    :param url: GitHub API endpoint.
+    :param etag: ETag header of the response.
+    :param data: JSON data of the response.
+    """
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    with open(_cache_path(url), "w") as cache_file:
+        json.dump({"etag": etag, "data": data}, cache_file)
+
+
+def _retry_after(response, default):
+    """
+    Reads the number of seconds to wait from the "Retry-After" header of the response.
+    :param response: Response returned by the GitHub API.
+    :param default: Number of seconds to wait if the header is missing, malformed or already elapsed.
+    :return: Number of seconds to wait before retrying.
+    """
+    value = response.headers.get("Retry-After")
+    if value is None:
+        return default
+    try:
+        seconds = float(value)
+    except ValueError:
+        # The header may also be given as an HTTP-date
+        try:
+            seconds = (parsedate_to_datetime(value) - datetime.now(timezone.utc)).total_seconds()
+        except (TypeError, ValueError):
+            return default
+    # A date in the past must not turn the retries into a burst of requests
+    return seconds if seconds > 0 else default
+
+
+async def _fetch(client, url, _token, retries=5):
+    """
+    Fetches JSON data from the GitHub API, waiting while the statistics are being computed.
+    Responses are cached on disk and revalidated with their ETag on subsequent runs.
+    :param client: Shared asynchronous HTTP client.
+    :param url: GitHub API endpoint to request.
+    :param _token: GitHub API token.
+    :param retries: Number of attempts before giving up on a "202 Accepted" response.
+    :return: JSON response of the endpoint.
+    """
+    headers = {"Authorization": f"token {_token}"}
+    etag, cached = _load_cache(url)
+    if etag:
+        headers["If-None-Match"] = etag
+
+    delay = 1
+    for attempt in range(retries):
+        response = await client.get(url, headers=headers)
+        # Statistics did not change since the last run
+        if response.status_code == 304:
+            return cached
+        response.raise_for_status()
+        # Empty repositories have no statistics at all
+        if response.status_code == 204:
+            return []
+        if response.status_code != 202:
+            data = response.json()
+            if response.headers.get("ETag"):
+                _store_cache(url, response.headers["ETag"], data)
+            return data
+        # GitHub answers with 202 while it computes statistics in the background
+        if attempt == retries - 1:
+            break
+        await asyncio.sleep(_retry_after(response, delay))
+        delay *= 2
+    raise httpx.HTTPError(f"Statistics for {url} are still being computed, try again later.")
+
+
+async def fetch_code_frequency(client, _owner, _name, _token):
     """
     Fetches code frequency data (additions and deletions) from the GitHub API.
+    :param client: Shared asynchronous HTTP client.
     :param _owner: Owner of the GitHub repository.
     :param _name: Name of the GitHub repository.
     :param _token: GitHub API token.
     :return: JSON response with code frequency data.
     """
     url = f"https://api.github.com/repos/{_owner}/{_name}/stats/code_frequency"
-    headers = {"Authorization": f"token {_token}"}
-    response = requests.get(url, headers=headers)
-    response.raise_for_status()
-    return response.json()
+    return await _fetch(client, url, _token)
 
 
-def fetch_commit_activity(_owner, _name, _token):
+async def fetch_commit_activity(client, _owner, _name, _token):
     """
     Fetches commit activity data for each contributor from the GitHub API.
+    :param client: Shared asynchronous HTTP client.
     :param _owner: Owner of the GitHub repository.
     :param _name: Name of the GitHub repository.
     :param _token: GitHub API token.
     :return: JSON response with commit activity data.
     """
     url = f"https://api.github.com/repos/{_owner}/{_name}/stats/contributors"
-    headers = {"Authorization": f"token {_token}"}
-    response = requests.get(url, headers=headers)
-    response.raise_for_status()
-    return response.json()
+    return await _fetch(client, url, _token)
+
+
+async def fetch_statistics(_owner, _name, _token):
+    """
+    Fetches code frequency and commit activity data concurrently.
+    :param _owner: Owner of the GitHub repository.
+    :param _name: Name of the GitHub repository.
+    :param _token: GitHub API token.
+    :return: Tuple of JSON responses with code frequency and commit activity data.
+    """
+    # Follow redirects of renamed or transferred repositories, as requests used to
+    async with httpx.AsyncClient(follow_redirects=True, timeout=REQUEST_TIMEOUT) as client:
+        return await asyncio.gather(
+            fetch_code_frequency(client, _owner, _name, _token),
+            fetch_commit_activity(client, _owner, _name, _token),
+        )
 
 
 def process_data(code_freq, activity):
     """
-    Processes the raw data into structured pandas DataFrames for plotting.
+    Processes the raw data into structured data for plotting.
     :param code_freq: Raw code frequency data.
     :param activity: Raw commit activity data.
-    :return: Tuple of DataFrames for code frequency and commit activity.
+    :return: Tuple of DataFrame for code frequency, mapping of contributor login to arrays of
+             timestamps and commit counts, and the code frequency scaling factor.
     """
     # Process code frequency
-    code_dataframe: DataFrame = pd.DataFrame(code_freq, columns=["timestamp", "additions", "deletions"])
-    code_dataframe["timestamp"] = pd.to_datetime(code_dataframe["timestamp"], unit="s")
-    code_dataframe["deletions"] = -code_dataframe["deletions"].abs()  # Deletions are shown as negative
+    code_array = np.asarray(code_freq, dtype=np.int64).reshape(-1, 3)
+    code_dataframe: DataFrame = pd.DataFrame({
+        "timestamp": pd.to_datetime(code_array[:, 0], unit="s"),
+        "additions": code_array[:, 1].astype(np.int32),
+        "deletions": -np.abs(code_array[:, 2]).astype(np.int32),  # Deletions are shown as negative
+    })
+
+    # Process commit activity: keep plain arrays per contributor, no DataFrame is needed for plotting
+    logins = [contributor["author"]["login"] for contributor in activity]
+    weeks = [week for contributor in activity for week in contributor["weeks"]]
+    timestamps = np.fromiter((week["w"] for week in weeks), dtype=np.int64, count=len(weeks))
+    counts = np.fromiter((week["c"] for week in weeks), dtype=np.int32, count=len(weeks))
 
-    # Process commit activity
-    contributors_data = []
-    for contributor in activity:
-        name = contributor["author"]["login"]
-        weeks = contributor["weeks"]
-        weekly_data = pd.DataFrame(weeks)
-        weekly_data["author"] = name
-        weekly_data["timestamp"] = pd.to_datetime(weekly_data["w"], unit="s")
-        contributors_data.append(weekly_data[["timestamp", "c", "author"]])
+    # Convert all weeks at once, then split them back by contributor
+    offsets = np.cumsum([len(contributor["weeks"]) for contributor in activity])[:-1]
+    dates = pd.to_datetime(timestamps, unit="s").to_numpy()
+    commit_activity = dict(zip(logins, zip(np.split(dates, offsets), np.split(counts, offsets))))
 
-    commit_dataframe: DataFrame = pd.concat(contributors_data, ignore_index=True)
+    # Scale code frequency data to the commit counts for better visualization
+    max_commits = counts.max(initial=0) or 1
+    max_changes = np.abs(code_array[:, 1:]).max(initial=0) or 1
+    scaling_factor = max_commits / max_changes
 
-    return code_dataframe, commit_dataframe
+    return code_dataframe, commit_activity, scaling_factor
 
 
-def plot_data(code_dataframe, commit_dataframe):
+def downsample(x, y, n_out=MAX_POINTS):
+    """
+    Downsamples a time series with the Largest-Triangle-Three-Buckets algorithm.
+    :param x: Timestamps of the series.
+    :param y: Values of the series.
+    :param n_out: Maximum number of points to keep.
+    :return: Tuple of downsampled timestamps and values.
+    """
+    x, y = np.asarray(x), np.asarray(y)
+    size = len(x)
+    if size <= n_out or n_out < 3:
+        return x, y
+
+    # Work on epoch nanoseconds so triangle areas can be computed for datetime axes
+    xs = x.astype("datetime64[ns]").astype(np.int64).astype(np.float64)
+    ys = y.astype(np.float64)
+    every = (size - 2) / (n_out - 2)
+    indices = np.empty(n_out, dtype=np.int64)
+    indices[0], indices[-1] = 0, size - 1
+
+    a = 0
+    for i in range(n_out - 2):
+        start, end = int(i * every) + 1, int((i + 1) * every) + 1
+        next_end = min(int((i + 2) * every) + 1, size)
+        avg_x, avg_y = xs[end:next_end].mean(), ys[end:next_end].mean()
+        area = np.abs((xs[a] - avg_x) * (ys[start:end] - ys[a]) - (xs[a] - xs[start:end]) * (avg_y - ys[a]))
+        a = start + int(area.argmax())
+        indices[i + 1] = a
+
+    return x[indices], y[indices]
+
+
+def aggregate(x, y, n_bins=AGGREGATION_BINS):
+    """
+    Aggregates a time series into fixed-width bins with minimum, maximum and mean values.
+    Series shorter than the aggregation threshold are returned as they are.
+    :param x: Sorted timestamps of the series.
+    :param y: Values of the series.
+    :param n_bins: Number of bins to aggregate into.
+    :return: Tuple of timestamps, minimum values, maximum values and mean values;
+             minimum and maximum values are None if the series was not aggregated.
+    """
+    x, y = np.asarray(x), np.asarray(y)
+    if len(x) < AGGREGATION_THRESHOLD:
+        return x, None, None, y
+
+    xs = x.astype("datetime64[ns]").astype(np.int64)
+    edges = np.linspace(xs[0], xs[-1], n_bins + 1)[1:-1]
+    bins = np.digitize(xs, edges)
+
+    # Timestamps are sorted, so each non-empty bin is a contiguous run starting where the bin index changes
+    starts = np.flatnonzero(np.diff(bins, prepend=-1))
+    sizes = np.diff(starts, append=len(x))
+    low = np.minimum.reduceat(y, starts)
+    high = np.maximum.reduceat(y, starts)
+    mean = np.add.reduceat(y, starts, dtype=np.float64) / sizes
+
+    return x[starts], low, high, mean
+
+
+def plot_data(code_dataframe, commit_activity, scaling_factor):
     """
     Visualizes code frequency and contributor activity using Plotly.
+    The combined graph and both "raw" graphs are rendered as rows of a single figure.
     :param code_dataframe: DataFrame containing code frequency data.
-    :param commit_dataframe: DataFrame containing commit activity data.
+    :param commit_activity: Mapping of contributor login to arrays of timestamps and commit counts.
+    :param scaling_factor: Factor bringing code frequency data to the scale of commit counts.
     """
-    fig = go.Figure()
+    fig = make_subplots(
+        rows=3,
+        cols=1,
+        shared_xaxes=True,
+        vertical_spacing=0.06,
+        subplot_titles=(
+            "Code frequency withing contributor activity",
+            "Raw code frequency",
+            "Raw commit activity",
+        ),
+    )
 
-    # Scale code frequency data for better visualization
-    max_commits = commit_dataframe["c"].max() or 1
-    scaling_factor = max_commits / max(code_dataframe["additions"].max(), abs(code_dataframe["deletions"].min()))
+    timestamps = code_dataframe["timestamp"]
+    additions = downsample(timestamps, code_dataframe["additions"])
+    deletions = downsample(timestamps, code_dataframe["deletions"])
+    scaled_additions = downsample(timestamps, code_dataframe["additions"] * scaling_factor)
+    scaled_deletions = downsample(timestamps, code_dataframe["deletions"] * scaling_factor)
+    contributors = [
+        (contributor, aggregate(contributor_timestamps, contributor_counts))
+        for contributor, (contributor_timestamps, contributor_counts) in commit_activity.items()
+    ]
 
     # Add code frequency data with filled areas
     fig.add_trace(
         go.Scatter(
-            x=code_dataframe["timestamp"],
-            y=code_dataframe["additions"] * scaling_factor,
+            x=scaled_additions[0],
+            y=scaled_additions[1],
             mode="lines",
             fill="tozeroy",
             line=dict(color="green", width=2),
             name="Additions (scaled)",
             opacity=0.6
-        )
+        ),
+        row=1,
+        col=1,
     )
     fig.add_trace(
         go.Scatter(
-            x=code_dataframe["timestamp"],
-            y=code_dataframe["deletions"] * scaling_factor,
+            x=scaled_deletions[0],
+            y=scaled_deletions[1],
             mode="lines",
             fill="tozeroy",
             line=dict(color="red", dash="dot", width=2),
             name="Deletions (scaled)",
             opacity=0.6
-        )
-    )
-
-    # Add commit activity data for each contributor
-    contributors = commit_dataframe["author"].unique()
-    for contributor in contributors:
-        contributor_data = commit_dataframe[commit_dataframe["author"] == contributor]
-        fig.add_trace(
-            go.Scatter(
-                x=contributor_data["timestamp"],
-                y=contributor_data["c"],
-                mode="lines+markers",
-                line=dict(width=1.5),
-                name=f"Commits by: {contributor}"
-            )
-        )
-
-    # Set layout for dark theme
-    fig.update_layout(
-        title="Code frequency withing contributor activity",
-        xaxis=dict(title="Date"),
-        yaxis=dict(title="Changes (additions/deletions scaled)"),
-        template="plotly_dark",
-        hovermode="x unified",
-        legend=dict(orientation="h", yanchor="bottom", y=-0.3, xanchor="center", x=0.5),
-        margin=dict(l=40, r=40, t=40, b=40),
+        ),
+        row=1,
+        col=1,
     )
 
-    fig.show()
-
     # Raw code frequency graph
-    fig_code_freq = go.Figure()
-    fig_code_freq.add_trace(
+    fig.add_trace(
         go.Scatter(
-            x=code_dataframe["timestamp"],
-            y=code_dataframe["additions"],
+            x=additions[0],
+            y=additions[1],
             mode="lines",
             line=dict(color="green"),
             name="Additions",
-        )
+            legendgroup="Additions",
+        ),
+        row=2,
+        col=1,
     )
-    fig_code_freq.add_trace(
+    fig.add_trace(
         go.Scatter(
-            x=code_dataframe["timestamp"],
-            y=code_dataframe["additions"],
+            x=additions[0],
+            y=additions[1],
             mode="lines",
             fill="tozeroy",
             line=dict(color="green", width=2),
-            name="Additions (scaled)",
+            name="Additions",
+            legendgroup="Additions",
+            showlegend=False,
             opacity=0.6
-        )
+        ),
+        row=2,
+        col=1,
     )
-    fig_code_freq.add_trace(
+    fig.add_trace(
         go.Scatter(
-            x=code_dataframe["timestamp"],
-            y=code_dataframe["deletions"] * scaling_factor,
+            x=deletions[0],
+            y=deletions[1],
             mode="lines",
             fill="tozeroy",
             line=dict(color="red", dash="dot", width=2),
-            name="Deletions (scaled)",
+            name="Deletions",
+            legendgroup="Deletions",
             opacity=0.6
-        )
-    )
-    fig_code_freq.update_layout(
-        title="Raw code frequency",
-        xaxis=dict(title="Date"),
-        yaxis=dict(title="Additions/Deletions"),
-        template="plotly_dark",
+        ),
+        row=2,
+        col=1,
     )
-    fig_code_freq.show()
-
-    # Raw commit activity graph
-    fig_commit_activity = go.Figure()
-    for contributor in contributors:
-        contributor_data = commit_dataframe[commit_dataframe["author"] == contributor]
-        fig_commit_activity.add_trace(
-            go.Scatter(
-                x=contributor_data["timestamp"],
-                y=contributor_data["c"],
-                mode="lines+markers",
-                line=dict(width=1.5),
-                name=f"Commits by {contributor}",
+
+    # Add commit activity data for each contributor, both to the combined and the raw graph.
+    # Contributor traces are rendered with WebGL, filled areas above are kept as SVG
+    for index, (contributor, (x, low, high, y)) in enumerate(contributors):
+        color = qualitative.Plotly[index % len(qualitative.Plotly)]
+        fillcolor = "rgba({}, {}, {}, 0.3)".format(*hex_to_rgb(color))
+        for row in (1, 3):
+            if low is not None:
+                # Min/max silhouette of the binned commits, drawn beneath the mean line
+                envelope = dict(
+                    x=x,
+                    mode="lines",
+                    line=dict(width=0, color=color),
+                    legendgroup=contributor,
+                    showlegend=False,
+                    hoverinfo="skip",
+                )
+                fig.add_trace(go.Scattergl(**envelope, y=high), row=row, col=1)
+                fig.add_trace(go.Scattergl(**envelope, y=low, fill="tonexty", fillcolor=fillcolor), row=row, col=1)
+            fig.add_trace(
+                go.Scattergl(
+                    x=x,
+                    y=y,
+                    mode="lines+markers" if low is None else "lines",
+                    line=dict(width=1.5, color=color),
+                    name=f"Commits by: {contributor}",
+                    legendgroup=contributor,
+                    showlegend=row == 1,
+                ),
+                row=row,
+                col=1,
             )
-        )
-    fig_commit_activity.update_layout(
-        title="Raw commit activity",
-        xaxis=dict(title="Date"),
-        yaxis=dict(title="Commits"),
-        template="plotly_dark",
-    )
-    fig_commit_activity.show()
+
+    # Set layout for dark theme
+    fig.update_layout(height=1200, **BASE_LAYOUT)
+    fig.update_xaxes(title_text="Date", row=3, col=1)
+    fig.update_yaxes(title_text="Changes (additions/deletions scaled)", row=1, col=1)
+    fig.update_yaxes(title_text="Additions/Deletions", row=2, col=1)
+    fig.update_yaxes(title_text="Commits", row=3, col=1)
+
+    fig.show()
 
 
 if __name__ == "__main__":
@@ -245,9 +466,8 @@ def plot_data(code_dataframe, commit_dataframe):
     repo_owner, repo_name, token = load_env_variables()
 
     try:
-        code_frequency = fetch_code_frequency(repo_owner, repo_name, token)
-        commit_activity = fetch_commit_activity(repo_owner, repo_name, token)
-        code_df, commit_df = process_data(code_frequency, commit_activity)
-        plot_data(code_df, commit_df)
-    except requests.exceptions.RequestException as e:
+        code_frequency, commit_activity = asyncio.run(fetch_statistics(repo_owner, repo_name, token))
+        code_df, commits, scaling = process_data(code_frequency, commit_activity)
+        plot_data(code_df, commits, scaling)
+    except httpx.HTTPError as e:
         print(f"Error fetching data from GitHub: {e}")